@@ -1,14 +1,46 @@
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, UploadFile, File, Form, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from utils.image_processing import process_image
-import shutil
+from fastapi.responses import FileResponse, Response
+from utils.image_processing import process_image_bytes, warm_up
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from urllib.parse import quote
+import aiofiles
+import asyncio
+import functools
 import uuid
 import os
 from typing import Optional
 
 
-app = FastAPI()
+OUTPUT_DIR = "processed"
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+# Image processing is CPU-bound, so it runs in worker processes to keep the
+# event loop free and spread requests across cores. Windows caps a process
+# pool at 61 workers.
+WORKER_COUNT = min(os.cpu_count() or 1, 61)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    executor = ProcessPoolExecutor(max_workers=WORKER_COUNT)
+
+    # Start every worker up front so the first requests don't pay for
+    # process spawn and OpenCV initialization
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        *(loop.run_in_executor(executor, warm_up) for _ in range(WORKER_COUNT))
+    )
+
+    app.state.executor = executor
+    try:
+        yield
+    finally:
+        executor.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.add_middleware(
@@ -17,13 +49,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-File-Id", "X-Summary"],
 )
 
 
-UPLOAD_DIR = "uploads"
-OUTPUT_DIR = "processed"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+async def save_output(output_path: str, data: bytes):
+    """Write encoded image bytes to disk without blocking the event loop"""
+    async with aiofiles.open(output_path, "wb") as buffer:
+        await buffer.write(data)
 
 
 @app.get("/")
@@ -33,6 +66,8 @@ async def root():
 
 @app.post("/process")
 async def process_image_endpoint(
+    request: Request,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     brightness: Optional[float] = Form(0),
     contrast: Optional[float] = Form(1.0),
@@ -40,28 +75,43 @@ async def process_image_endpoint(
     hue: Optional[float] = Form(0),
     exposure: Optional[float] = Form(0),
     accessibility_filter: Optional[str] = Form(None),
-    auto_enhance: Optional[bool] = Form(False)
+    auto_enhance: Optional[bool] = Form(False),
+    inline: bool = False
 ):
     file_id = str(uuid.uuid4())
-    input_path = os.path.join(UPLOAD_DIR, f"{file_id}_{file.filename}")
     output_path = os.path.join(OUTPUT_DIR, f"{file_id}_processed.jpg")
 
-    # Save uploaded file
-    with open(input_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Keep the upload in memory; it is decoded directly in the worker process
+    data = await file.read()
 
     # Process image with enhanced adjustments
-    summary = process_image(
-        input_path, 
-        output_path,
-        brightness=brightness,
-        contrast=contrast,
-        saturation=saturation,
-        hue=hue,
-        exposure=exposure,
-        accessibility_filter=accessibility_filter,
-        auto_enhance=auto_enhance
+    encoded, summary = await asyncio.get_running_loop().run_in_executor(
+        request.app.state.executor,
+        functools.partial(
+            process_image_bytes,
+            data,
+            brightness=brightness,
+            contrast=contrast,
+            saturation=saturation,
+            hue=hue,
+            exposure=exposure,
+            accessibility_filter=accessibility_filter,
+            auto_enhance=auto_enhance
+        )
     )
+    if encoded is None:
+        return {"error": summary}
+
+    # Stream the image straight back and persist the copy after responding
+    if inline:
+        background_tasks.add_task(save_output, output_path, encoded)
+        return Response(
+            encoded,
+            media_type="image/jpeg",
+            headers={"X-File-Id": file_id, "X-Summary": quote(summary)}
+        )
+
+    await save_output(output_path, encoded)
 
     return {
         "processed_url": f"http://localhost:8000/{output_path}",
@@ -85,8 +135,8 @@ async def download_image(file_id: str):
 
 @app.get("/{file_path:path}")
 async def get_file(file_path: str):
-    # Only serve files from uploads and processed directories
-    if file_path.startswith("uploads/") or file_path.startswith("processed/"):
+    # Only serve files from the processed directory
+    if file_path.startswith(f"{OUTPUT_DIR}/"):
         if os.path.exists(file_path):
             return FileResponse(file_path)
         else:
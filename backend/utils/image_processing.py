@@ -1,7 +1,84 @@
 import cv2
 import numpy as np
-from typing import Dict, List, Tuple
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 import json
+import threading
+
+
+# Histogram, contrast and saturation metrics are computed on a thumbnail whose
+# long edge is at most this many pixels
+METRICS_MAX_SIZE = 512
+
+# Saturation and hue offsets closer to their defaults than this are treated
+# as untouched sliders (frontend float parsing rarely lands exactly on 1.0/0)
+SATURATION_TOLERANCE = 1e-3
+HUE_TOLERANCE = 0.5
+
+# Summary used when no enhancement produced a notable change
+DEFAULT_SUMMARY = "Applied subtle enhancements to improve overall image quality"
+
+# JPEG output settings: quality 85 with optimized Huffman tables is visually
+# indistinguishable from the default 95 for web delivery and much smaller
+JPEG_ENCODE_PARAMS = [
+    cv2.IMWRITE_JPEG_QUALITY, 85,
+    cv2.IMWRITE_JPEG_OPTIMIZE, 1,
+    cv2.IMWRITE_JPEG_PROGRESSIVE, 0,
+]
+
+# CLAHE used by the high-contrast accessibility filter, created once per process
+HIGH_CONTRAST_CLAHE = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
+
+# Color-blindness simulations as BGR -> BGR channel mixing matrices
+COLORBLIND_MATRICES = {
+    # Protanopia (red-blind): red channel replaced by half of green
+    "colorblind_protanopia": np.array([[1.0, 0.0, 0.0],
+                                       [0.0, 1.0, 0.0],
+                                       [0.0, 0.5, 0.0]], dtype=np.float32),
+    # Deuteranopia (green-blind): green channel replaced by half of red
+    "colorblind_deuteranopia": np.array([[1.0, 0.0, 0.0],
+                                         [0.0, 0.0, 0.5],
+                                         [0.0, 0.0, 1.0]], dtype=np.float32),
+    # Tritanopia (blue-blind): blue channel replaced by half of green
+    "colorblind_tritanopia": np.array([[0.0, 0.5, 0.0],
+                                       [0.0, 1.0, 0.0],
+                                       [0.0, 0.0, 1.0]], dtype=np.float32),
+}
+
+
+# Metric thumbnail buffers are reused per thread for this many image sizes
+SCRATCH_MAX_SHAPES = 4
+
+_scratch = threading.local()
+
+
+def get_scratch_buffer(name: str, shape: Tuple[int, ...],
+                       dtype: type = np.uint8) -> np.ndarray:
+    """
+    Return a reusable thumbnail-sized intermediate buffer for the current thread.
+    Buffers are grouped by image size and evicted least recently used first.
+    Only shapes up to METRICS_MAX_SIZE are pooled, so the scratchpad stays a
+    few megabytes per worker; larger shapes get a fresh array every call.
+    A buffer is only valid until the next request for the same name and size,
+    so it must never be returned to callers.
+    """
+    if max(shape[:2]) > METRICS_MAX_SIZE:
+        return np.empty(shape, dtype=dtype)
+    
+    buffers = getattr(_scratch, "buffers", None)
+    if buffers is None:
+        buffers = _scratch.buffers = OrderedDict()
+    
+    key = tuple(shape[:2])
+    slot = buffers.setdefault(key, {})
+    buffers.move_to_end(key)
+    while len(buffers) > SCRATCH_MAX_SHAPES:
+        buffers.popitem(last=False)
+    
+    buf = slot.get(name)
+    if buf is None or buf.shape != tuple(shape) or buf.dtype != dtype:
+        buf = slot[name] = np.empty(shape, dtype=dtype)
+    return buf
 
 
 def calculate_perceptual_metrics(img: np.ndarray) -> Dict[str, float]:
@@ -11,22 +88,41 @@ def calculate_perceptual_metrics(img: np.ndarray) -> Dict[str, float]:
     - Brightness balance: Histogram analysis
     - Contrast: Standard deviation of pixel values
     """
-    # Convert to grayscale for some metrics
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    
-    # Sharpness (Laplacian variance)
-    laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+    # Sharpness (Laplacian variance) depends on resolution, so it is measured
+    # on the full-size gray image; the 8-bit Laplacian fits in int16
+    full_gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    _, laplacian_std = cv2.meanStdDev(cv2.Laplacian(full_gray, cv2.CV_16S))
+    laplacian_var = laplacian_std[0, 0] ** 2
+    
+    # The remaining metrics are distribution statistics that are stable under
+    # downsampling, so large images are reduced to a thumbnail first
+    h, w = img.shape[:2]
+    scale = METRICS_MAX_SIZE / max(h, w)
+    if scale < 1:
+        # Clamp so very thin images never round down to a zero-sized edge
+        size = (max(1, int(w * scale + 0.5)), max(1, int(h * scale + 0.5)))
+        thumb = get_scratch_buffer("thumbnail", (size[1], size[0], 3))
+        img = cv2.resize(img, size, dst=thumb, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY,
+                            dst=get_scratch_buffer("gray", img.shape[:2]))
+    else:
+        gray = full_gray
     
     # Brightness balance (histogram analysis)
-    hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
-    brightness_balance = np.std(hist) / np.mean(hist)
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float32)
+    brightness_balance = hist.std() / hist.mean()
     
-    # Contrast (standard deviation)
-    contrast = np.std(gray)
+    # Contrast (standard deviation), derived from the histogram instead of
+    # another pass over the pixels
+    counts = hist.astype(np.float64)
+    levels = np.arange(256, dtype=np.float64)
+    gray_mean = levels @ counts / counts.sum()
+    contrast = np.sqrt(((levels - gray_mean) ** 2) @ counts / counts.sum())
     
     # Color saturation (HSV)
-    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-    saturation_mean = np.mean(hsv[:, :, 1])
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV,
+                       dst=get_scratch_buffer("hsv", img.shape))
+    saturation_mean = cv2.mean(hsv)[1]
     
     return {
         "sharpness": float(laplacian_var),
@@ -87,7 +183,7 @@ def generate_explainable_summary(original_metrics: Dict[str, float],
             explanations.append(f"Decreased exposure by {abs(exposure_val):.1f} stops")
     
     if not explanations:
-        explanations.append("Applied subtle enhancements to improve overall image quality")
+        explanations.append(DEFAULT_SUMMARY)
     
     return " • ".join(explanations)
 
@@ -99,58 +195,113 @@ def apply_accessibility_filters(img: np.ndarray, filter_type: str) -> np.ndarray
     if filter_type == "high_contrast":
         # Increase contrast significantly
         lab = cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
-        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-        l = clahe.apply(l)
-        lab = cv2.merge([l, a, b])
+        lab[:, :, 0] = HIGH_CONTRAST_CLAHE.apply(lab[:, :, 0])
         return cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
     
-    elif filter_type == "colorblind_protanopia":
-        # Simulate protanopia (red-blind)
-        # Convert to LMS color space approximation
-        img_float = img.astype(np.float32) / 255.0
-        # Simple approximation for protanopia
-        img_float[:, :, 2] = img_float[:, :, 1] * 0.5  # Reduce red channel
-        return (img_float * 255).astype(np.uint8)
-    
-    elif filter_type == "colorblind_deuteranopia":
-        # Simulate deuteranopia (green-blind)
-        img_float = img.astype(np.float32) / 255.0
-        img_float[:, :, 1] = img_float[:, :, 2] * 0.5  # Reduce green channel
-        return (img_float * 255).astype(np.uint8)
-    
-    elif filter_type == "colorblind_tritanopia":
-        # Simulate tritanopia (blue-blind)
-        img_float = img.astype(np.float32) / 255.0
-        img_float[:, :, 0] = img_float[:, :, 1] * 0.5  # Reduce blue channel
-        return (img_float * 255).astype(np.uint8)
+    elif filter_type in COLORBLIND_MATRICES:
+        # Simulate color blindness as a 3x3 channel mix on the uint8 image
+        return cv2.transform(img, COLORBLIND_MATRICES[filter_type])
     
     return img
 
 
-def process_image(input_path: str, output_path: str, 
-                 brightness: float = 0, contrast: float = 1.0, 
-                 saturation: float = 1.0, hue: float = 0, 
-                 exposure: float = 0, accessibility_filter: str = None,
-                 auto_enhance: bool = False) -> str:
+def apply_tone_curve(img_float: np.ndarray, brightness: float = 0,
+                     contrast: float = 1.0, exposure: float = 0) -> np.ndarray:
     """
-    Enhanced image processing with explainable AI and perceptual quality metrics
+    Apply brightness, contrast, exposure and gamma in place on a float32 image.
+    Every stage writes back into the same buffer so no temporaries are allocated.
     """
-    img = cv2.imread(input_path, cv2.IMREAD_COLOR)
-    if img is None:
-        return "Error: Could not load image"
+    # Derived constants are computed once, as float32 so no stage upcasts
+    exposure_scale = np.float32(2 ** exposure)
+    gamma = np.float32(1.0 / contrast if contrast > 0 else 1.0)
+    
+    # Brightness adjustment
+    if brightness != 0:
+        np.add(img_float, np.float32(brightness), out=img_float)
+        np.clip(img_float, 0, 1, out=img_float)
+    
+    # Contrast adjustment
+    if contrast != 1.0:
+        np.multiply(img_float, np.float32(contrast), out=img_float)
+        np.clip(img_float, 0, 1, out=img_float)
+    
+    # Exposure adjustment
+    if exposure != 0:
+        np.multiply(img_float, exposure_scale, out=img_float)
+        np.clip(img_float, 0, 1, out=img_float)
+    
+    # Gamma correction for better tone mapping
+    if contrast != 1.0:
+        np.power(img_float, gamma, out=img_float)
+    
+    return img_float
+
+
+def build_tone_lut(brightness: float = 0, contrast: float = 1.0,
+                   exposure: float = 0) -> np.ndarray:
+    """
+    Build a 256-entry uint8 lookup table for the tone curve.
+    All tone adjustments are pointwise functions of intensity, so evaluating
+    them on every possible input value is equivalent to the per-pixel math.
+    """
+    levels = np.arange(256, dtype=np.float32) / 255.0
+    apply_tone_curve(levels, brightness, contrast, exposure)
+    return (levels * 255).astype(np.uint8)
+
+
+def adjust_saturation_hue(img: np.ndarray, saturation: float = 1.0,
+                          hue: float = 0) -> np.ndarray:
+    """
+    Adjust saturation and hue in uint8 HSV space with one per-channel lookup.
+    Both are pointwise in their channel, so no float32 copy of the image is needed.
+    """
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    levels = np.arange(256, dtype=np.float32)
+    identity = np.arange(256, dtype=np.uint8)
+    
+    # Hue shift with wrap-around (OpenCV stores 8-bit hue in [0, 180))
+    h_lut = identity
+    if hue != 0:
+        h_lut = ((levels + hue) % 180).astype(np.uint8)
+    
+    # Saturation scaling
+    s_lut = identity
+    if saturation != 1.0:
+        s_lut = np.clip(levels * saturation, 0, 255).astype(np.uint8)
+    
+    # Value is left unchanged
+    hsv_lut = np.dstack([h_lut, s_lut, identity])
+    cv2.LUT(hsv, hsv_lut, dst=hsv)
+    
+    return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+
+
+def process_image_array(img: np.ndarray,
+                        brightness: float = 0, contrast: float = 1.0, 
+                        saturation: float = 1.0, hue: float = 0, 
+                        exposure: float = 0, accessibility_filter: str = None,
+                        auto_enhance: bool = False) -> Tuple[np.ndarray, str]:
+    """
+    Enhanced image processing with explainable AI and perceptual quality metrics.
+    Operates on a decoded BGR image and returns the processed image and summary.
+    """
+    # With every adjustment at its default the pipeline is the identity, so
+    # skip the processing and both metrics passes
+    if (brightness == 0 and contrast == 1.0 and exposure == 0
+            and abs(saturation - 1.0) <= SATURATION_TOLERANCE
+            and abs(hue) <= HUE_TOLERANCE
+            and not accessibility_filter and not auto_enhance):
+        return img, DEFAULT_SUMMARY
     
     # Calculate original perceptual metrics
     original_metrics = calculate_perceptual_metrics(img)
     
-    # Convert to float32 for processing
-    img_float = img.astype(np.float32) / 255.0
-    
     # Auto-enhancement based on perceptual metrics (Wang et al., 2023)
     if auto_enhance:
-        # Auto-adjust brightness if image is too dark/bright
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        mean_brightness = np.mean(gray)
+        # Auto-adjust brightness if image is too dark/bright; the mean of the
+        # gray image is the luma-weighted mean of the channel means
+        mean_b, mean_g, mean_r, _ = cv2.mean(img)
+        mean_brightness = 0.114 * mean_b + 0.587 * mean_g + 0.299 * mean_r
         if mean_brightness < 80:  # Too dark
             brightness += 0.2
         elif mean_brightness > 180:  # Too bright
@@ -164,40 +315,24 @@ def process_image(input_path: str, output_path: str,
         if original_metrics["saturation"] < 100:
             saturation = max(saturation, 1.1)
     
-    # Apply brightness adjustment
-    if brightness != 0:
-        img_float = np.clip(img_float + brightness, 0, 1)
-    
-    # Apply contrast adjustment
-    if contrast != 1.0:
-        img_float = np.clip(img_float * contrast, 0, 1)
-    
-    # Apply exposure adjustment
-    if exposure != 0:
-        img_float = np.clip(img_float * (2 ** exposure), 0, 1)
-    
-    # Apply gamma correction for better tone mapping
-    if contrast != 1.0:
-        gamma = 1.0 / contrast if contrast > 0 else 1.0
-        img_float = np.power(img_float, gamma)
-    
-    # Convert back to uint8
-    img_processed = (img_float * 255).astype(np.uint8)
-    
-    # Apply saturation and hue adjustments
-    if saturation != 1.0 or hue != 0:
-        # Convert to HSV for saturation and hue adjustments
-        hsv = cv2.cvtColor(img_processed, cv2.COLOR_BGR2HSV).astype(np.float32)
-        
-        # Adjust saturation
-        hsv[:, :, 1] = np.clip(hsv[:, :, 1] * saturation, 0, 255)
-        
-        # Adjust hue
-        if hue != 0:
-            hsv[:, :, 0] = (hsv[:, :, 0] + hue) % 180
-        
-        # Convert back to BGR
-        img_processed = cv2.cvtColor(hsv.astype(np.uint8), cv2.COLOR_HSV2BGR)
+    # Apply brightness, contrast, exposure and gamma as one uint8 lookup,
+    # skipping the pass entirely when the tone sliders are at their defaults
+    if brightness != 0 or contrast != 1.0 or exposure != 0:
+        tone_lut = build_tone_lut(brightness, contrast, exposure)
+        img_processed = cv2.LUT(img, tone_lut)
+    else:
+        img_processed = img
+    
+    # Apply saturation and hue adjustments, ignoring slider noise around the
+    # defaults so an untouched slider never costs an HSV round-trip
+    saturation_changed = abs(saturation - 1.0) > SATURATION_TOLERANCE
+    hue_changed = abs(hue) > HUE_TOLERANCE
+    if saturation_changed or hue_changed:
+        img_processed = adjust_saturation_hue(
+            img_processed,
+            saturation if saturation_changed else 1.0,
+            hue if hue_changed else 0
+        )
     
     # Apply accessibility filters if specified
     if accessibility_filter:
@@ -206,9 +341,6 @@ def process_image(input_path: str, output_path: str,
     # Calculate processed perceptual metrics
     processed_metrics = calculate_perceptual_metrics(img_processed)
     
-    # Save the processed image
-    cv2.imwrite(output_path, img_processed)
-    
     # Generate explainable summary (Zhou et al., 2022)
     adjustments = {
         "brightness": brightness,
@@ -230,4 +362,66 @@ def process_image(input_path: str, output_path: str,
         }
         summary += f" • Applied {filter_names.get(accessibility_filter, accessibility_filter)} accessibility filter"
     
-    return summary
\ No newline at end of file
+    return img_processed, summary
+
+
+def process_image(input_path: str, output_path: str, 
+                 brightness: float = 0, contrast: float = 1.0, 
+                 saturation: float = 1.0, hue: float = 0, 
+                 exposure: float = 0, accessibility_filter: str = None,
+                 auto_enhance: bool = False) -> str:
+    """
+    Process an image file on disk and save the result to output_path
+    """
+    img = cv2.imread(input_path, cv2.IMREAD_COLOR)
+    if img is None:
+        return "Error: Could not load image"
+    
+    img_processed, summary = process_image_array(
+        img, brightness, contrast, saturation, hue, exposure,
+        accessibility_filter, auto_enhance
+    )
+    cv2.imwrite(output_path, img_processed, JPEG_ENCODE_PARAMS)
+    return summary
+
+
+def process_image_bytes(data: bytes, 
+                        brightness: float = 0, contrast: float = 1.0, 
+                        saturation: float = 1.0, hue: float = 0, 
+                        exposure: float = 0, accessibility_filter: str = None,
+                        auto_enhance: bool = False) -> Tuple[Optional[bytes], str]:
+    """
+    Process an encoded image held in memory and return the processed JPEG bytes
+    along with the summary. The bytes are None if the image could not be handled.
+    Decoding and encoding happen here so only compressed bytes cross process
+    boundaries.
+    """
+    if not data:
+        return None, "Error: Could not load image"
+    
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return None, "Error: Could not load image"
+    
+    img_processed, summary = process_image_array(
+        img, brightness, contrast, saturation, hue, exposure,
+        accessibility_filter, auto_enhance
+    )
+    ok, encoded = cv2.imencode(".jpg", img_processed, JPEG_ENCODE_PARAMS)
+    if not ok:
+        return None, "Error: Could not encode image"
+    return encoded.tobytes(), summary
+
+
+def warm_up() -> None:
+    """
+    Run the whole pipeline once on a tiny image so a fresh worker process has
+    imported OpenCV and initialized the JPEG codec before the first real
+    request arrives. Buffers are sized per upload, so none are preallocated.
+    """
+    img = np.zeros((8, 8, 3), dtype=np.uint8)
+    _, data = cv2.imencode(".jpg", img)
+    process_image_bytes(
+        data.tobytes(), brightness=0.1, contrast=1.1, saturation=1.1, hue=10,
+        exposure=0.1, accessibility_filter="high_contrast", auto_enhance=True
+    )
\ No newline at end of file
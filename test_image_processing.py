@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the backend image processing pipeline
+Run with pytest from the repository root
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from utils.image_processing import (
+    METRICS_MAX_SIZE,
+    calculate_perceptual_metrics,
+    get_scratch_buffer,
+    process_image_array,
+    process_image_bytes,
+)
+
+
+def test_metrics_extreme_aspect_ratio():
+    """Thin images must not collapse to a zero-sized metrics thumbnail"""
+    for shape in [(1, 2000, 3), (2000, 1, 3), (3, 5000, 3)]:
+        img = np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+        metrics = calculate_perceptual_metrics(img)
+        assert set(metrics) == {"sharpness", "brightness_balance", "contrast", "saturation"}
+
+        processed, summary = process_image_array(img, brightness=0.1, contrast=1.2)
+        assert processed.shape == shape
+        assert summary
+
+
+def test_sharpness_measured_at_full_resolution():
+    """Laplacian variance is resolution dependent, so it must skip the thumbnail"""
+    img = np.random.default_rng(1).integers(0, 256, (1600, 1200, 3), dtype=np.uint8)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    expected = cv2.Laplacian(gray, cv2.CV_64F).var()
+
+    metrics = calculate_perceptual_metrics(img)
+    assert np.isclose(metrics["sharpness"], expected, rtol=1e-6)
+
+
+def test_scratch_buffers_only_pool_thumbnail_sizes():
+    """Full-resolution shapes must not be retained by the scratchpad"""
+    small = (METRICS_MAX_SIZE, METRICS_MAX_SIZE // 2, 3)
+    assert get_scratch_buffer("test", small) is get_scratch_buffer("test", small)
+
+    large = (METRICS_MAX_SIZE + 1, METRICS_MAX_SIZE, 3)
+    assert get_scratch_buffer("test", large) is not get_scratch_buffer("test", large)
+
+
+def test_empty_upload_reports_error():
+    """An empty upload is reported as unloadable instead of raising"""
+    encoded, summary = process_image_bytes(b"")
+    assert encoded is None
+    assert summary == "Error: Could not load image"